@@ -1,7 +1,18 @@
+import argparse
+import asyncio
+import csv
+import json
+
 import requests
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "http://127.0.0.1:5000"
 
+# one keep-alive session for the whole CLI run, so menu actions reuse the socket
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0))
+SESSION.headers["Connection"] = "keep-alive"
+
 MENU = """
 ===========================
       LIBRARY SYSTEM
@@ -17,85 +28,127 @@ MENU = """
 9. List Members
 10. List Borrowed Books
 11. Exit
+12. Bulk Import Books (CSV)
 ===========================
 """
 
 def main():
-    while True:
-        print(MENU)
-        choice = input("Enter your choice: ").strip()
-
-        try:
-            if choice == "1":
-                bid = input("Enter Book ID: ").strip()
-                title = input("Enter Title: ").strip()
-                author = input("Enter Author: ").strip()
-                res = requests.post(f"{BASE_URL}/books", json={"book_id": bid, "title": title, "author": author})
-                print(res.json())
-
-            elif choice == "2":
-                bid = input("Enter Book ID to remove: ").strip()
-                res = requests.delete(f"{BASE_URL}/books/{bid}")
-                print(res.json())
-
-            elif choice == "3":
-                name = input("Enter Member Name: ").strip()
-                mid = input("Enter Member ID: ").strip()
-                res = requests.post(f"{BASE_URL}/members", json={"name": name, "member_id": mid})
-                print(res.json())
-
-            elif choice == "4":
-                mid = input("Enter Member ID: ").strip()
-                bid = input("Enter Book ID: ").strip()
-                res = requests.post(f"{BASE_URL}/borrow", json={"member_id": mid, "book_id": bid})
-                print(res.json())
-
-            elif choice == "5":
-                mid = input("Enter Member ID: ").strip()
-                bid = input("Enter Book ID: ").strip()
-                res = requests.post(f"{BASE_URL}/return", json={"member_id": mid, "book_id": bid})
-                print(res.json())
-
-            elif choice == "6":
-                res = requests.get(f"{BASE_URL}/books")
-                books = res.json()
-                print("\n--- All Books ---")
-                for b in books:
-                    print(f"{b['book_id']} | {b['title']} | {b['author']} | Available: {b['available']}")
-                print("----------------\n")
-
-            elif choice == "7":
-                res = requests.get(f"{BASE_URL}/books/available")
-                books = res.json()
-                print("\n--- Available Books ---")
-                for b in books:
-                    print(f"{b['book_id']} | {b['title']} | {b['author']}")
-                print("-----------------------\n")
-
-            elif choice == "8":
-                query = input("Enter title or author keyword: ").strip()
-                res = requests.get(f"{BASE_URL}/books/search", params={"q": query})
-                print(res.json())
-
-            elif choice == "9":
-                res = requests.get(f"{BASE_URL}/members")
-                print(res.json())
-
-            elif choice == "10":
-                res = requests.get(f"{BASE_URL}/borrowed")
-                print(res.json())
-
-            elif choice == "11":
-                print("Exiting CLI. Goodbye!")
-                break
-
-            else:
-                print("Invalid choice. Enter 1–11.")
-
-        except requests.exceptions.ConnectionError:
-            print("Cannot connect to API. Make sure Flask server is running at", BASE_URL)
-        except Exception as e:
-            print("Error:", e)
+    try:
+        while True:
+            print(MENU)
+            choice = input("Enter your choice: ").strip()
+
+            try:
+                if choice == "1":
+                    bid = input("Enter Book ID: ").strip()
+                    title = input("Enter Title: ").strip()
+                    author = input("Enter Author: ").strip()
+                    res = SESSION.post(f"{BASE_URL}/books", json={"book_id": bid, "title": title, "author": author})
+                    print(res.json())
+
+                elif choice == "2":
+                    bid = input("Enter Book ID to remove: ").strip()
+                    res = SESSION.delete(f"{BASE_URL}/books/{bid}")
+                    print(res.json())
+
+                elif choice == "3":
+                    name = input("Enter Member Name: ").strip()
+                    mid = input("Enter Member ID: ").strip()
+                    res = SESSION.post(f"{BASE_URL}/members", json={"name": name, "member_id": mid})
+                    print(res.json())
+
+                elif choice == "4":
+                    mid = input("Enter Member ID: ").strip()
+                    bid = input("Enter Book ID: ").strip()
+                    res = SESSION.post(f"{BASE_URL}/borrow", json={"member_id": mid, "book_id": bid})
+                    print(res.json())
+
+                elif choice == "5":
+                    mid = input("Enter Member ID: ").strip()
+                    bid = input("Enter Book ID: ").strip()
+                    res = SESSION.post(f"{BASE_URL}/return", json={"member_id": mid, "book_id": bid})
+                    print(res.json())
+
+                elif choice == "6":
+                    res = SESSION.get(f"{BASE_URL}/books")
+                    books = res.json()
+                    print("\n--- All Books ---")
+                    for b in books:
+                        print(f"{b['book_id']} | {b['title']} | {b['author']} | Available: {b['available']}")
+                    print("----------------\n")
+
+                elif choice == "7":
+                    res = SESSION.get(f"{BASE_URL}/books/available")
+                    books = res.json()
+                    print("\n--- Available Books ---")
+                    for b in books:
+                        print(f"{b['book_id']} | {b['title']} | {b['author']}")
+                    print("-----------------------\n")
+
+                elif choice == "8":
+                    query = input("Enter title or author keyword: ").strip()
+                    res = SESSION.get(f"{BASE_URL}/books/search", params={"q": query})
+                    print(res.json())
+
+                elif choice == "9":
+                    res = SESSION.get(f"{BASE_URL}/members")
+                    print(res.json())
+
+                elif choice == "10":
+                    res = SESSION.get(f"{BASE_URL}/borrowed")
+                    print(res.json())
+
+                elif choice == "11":
+                    print("Exiting CLI. Goodbye!")
+                    break
+
+                elif choice == "12":
+                    path = input("Enter CSV path (book_id,title,author): ").strip()
+                    with open(path, newline="", encoding="utf-8") as f:
+                        books = list(csv.DictReader(f))
+                    res = SESSION.post(f"{BASE_URL}/books/bulk", json=books)
+                    print(res.json())
+
+                else:
+                    print("Invalid choice. Enter 1–12.")
+
+            except requests.exceptions.ConnectionError:
+                print("Cannot connect to API. Make sure Flask server is running at", BASE_URL)
+            except Exception as e:
+                print("Error:", e)
+    finally:
+        SESSION.close()
+
+def run_script(path):
+    """Send every operation in a JSON script concurrently over keep-alive connections.
+
+    The script is a list of {"method", "endpoint", "body"} objects. Operations are
+    in flight at the same time, so they must not depend on each other's results.
+    """
+    import httpx  # only needed for script mode
+
+    with open(path, encoding="utf-8") as f:
+        ops = json.load(f)
+
+    async def run():
+        limits = httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        async with httpx.AsyncClient(base_url=BASE_URL, http2=False, limits=limits) as client:
+            return await asyncio.gather(
+                *[client.request(op["method"], op["endpoint"], json=op.get("body")) for op in ops],
+                return_exceptions=True,
+            )
+
+    for op, res in zip(ops, asyncio.run(run())):
+        if isinstance(res, Exception):
+            print(f"{op['method']} {op['endpoint']} -> Error: {res}")
+        else:
+            print(f"{op['method']} {op['endpoint']} -> {res.status_code} {res.text}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Library system API client")
+    parser.add_argument("--script", help="JSON file of operations to send in bulk instead of the menu")
+    args = parser.parse_args()
+    if args.script:
+        run_script(args.script)
+    else:
+        main()
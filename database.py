@@ -1,31 +1,189 @@
+import queue
 import sqlite3
-from typing import List, Dict, Optional
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# -------------------- SQL --------------------
+# Kept as module constants so every call passes the identical string and hits
+# the connection's prepared-statement cache instead of re-parsing.
+BOOK_COLUMNS = "book_id, title, author, available"
+
+SQL_INSERT_BOOK = "INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, ?)"
+SQL_DELETE_BOOK = "DELETE FROM books WHERE book_id = ? RETURNING book_id"
+SQL_GET_BOOKS = f"SELECT {BOOK_COLUMNS} FROM books"
+SQL_SEARCH_BOOKS = f"""
+    SELECT {BOOK_COLUMNS} FROM books
+    WHERE title LIKE ? ESCAPE '\\' OR author LIKE ? ESCAPE '\\'
+"""
+# trigram FTS5 matches any substring of 3+ characters, same semantics as the LIKE above
+SQL_SEARCH_BOOKS_FTS = """
+    SELECT b.book_id, b.title, b.author, b.available
+    FROM books_fts JOIN books b ON b.rowid = books_fts.rowid
+    WHERE books_fts MATCH ?
+"""
+FTS_MIN_QUERY = 3
+SQL_GET_AVAILABLE_BOOKS = f"SELECT {BOOK_COLUMNS} FROM books WHERE available = 1"
+SQL_FIND_BOOK = f"SELECT {BOOK_COLUMNS} FROM books WHERE book_id = ?"
+SQL_UPDATE_AVAILABILITY = "UPDATE books SET available = ? WHERE book_id = ?"
+
+SQL_INSERT_MEMBER = "INSERT INTO members (member_id, name) VALUES (?, ?)"
+SQL_GET_MEMBERS = "SELECT member_id, name FROM members"
+SQL_FIND_MEMBER = "SELECT member_id, name FROM members WHERE member_id = ?"
+
+# borrow/return only touch rows in the expected state, so a single write
+# transaction both checks and applies the change
+SQL_MARK_BORROWED = "UPDATE books SET available = 0 WHERE book_id = ? AND available = 1 RETURNING book_id"
+SQL_INSERT_BORROWED = """
+    INSERT INTO borrowed_books (member_id, book_id)
+    SELECT member_id, ? FROM members WHERE member_id = ?
+"""
+SQL_DELETE_BORROWED = "DELETE FROM borrowed_books WHERE member_id = ? AND book_id = ? RETURNING book_id"
+SQL_CREATE_BORROWED_VIEW = """
+    CREATE VIEW IF NOT EXISTS v_borrowed AS
+    SELECT b.book_id, b.title, b.author, m.member_id, m.name AS member_name
+    FROM borrowed_books bb
+    JOIN books b ON bb.book_id = b.book_id
+    JOIN members m ON bb.member_id = m.member_id
+"""
+SQL_GET_BORROWED = "SELECT book_id, title, author, member_id, member_name FROM v_borrowed"
+
+
+# -------------------- CONNECTION POOL --------------------
+# process-wide cap on SQLite's heap; past it, page caches of every pooled
+# connection give memory back instead of growing with the thread count
+SOFT_HEAP_LIMIT = 64 * 1024 * 1024
+# idle read connections kept for reuse; request threads come and go (the dev
+# server starts one per request), so readers are pooled rather than per-thread
+READER_POOL_SIZE = 8
+
+class ConnectionPool:
+    """One writer connection owned by a background thread, plus a bounded pool of readers.
+
+    Writes are queued to the writer thread and run one at a time, each in its own
+    transaction; reads borrow an idle reader connection for the duration of the
+    query, which WAL lets run alongside the writer. In-memory databases cannot be shared between
+    connections, so readers fall back to the writer connection there.
+    """
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self._memory = db_name == ":memory:"
+        self._idle_readers: List[sqlite3.Connection] = []
+        self._state_lock = threading.Lock()
+        self._closed = False
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.writer = self._connect()
+        self.writer.execute(f"PRAGMA soft_heap_limit={SOFT_HEAP_LIMIT}")
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute("PRAGMA synchronous=NORMAL")
+        self.writer.execute("PRAGMA cache_spill=0")
+        self._thread = threading.Thread(target=self._run_writer, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _run_writer(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            func, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with self.writer:
+                    result = func(self.writer)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def write(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``func(conn)`` in one transaction on the writer thread and return its result."""
+        if threading.current_thread() is self._thread:
+            return func(self.writer)
+        future: Future = Future()
+        with self._state_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            self._jobs.put((func, future))
+        return future.result()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Lend out a read connection, reusing an idle one when there is one."""
+        if self._memory:
+            yield self.writer
+            return
+        with self._state_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            conn = self._idle_readers.pop() if self._idle_readers else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._state_lock:
+                if not self._closed and len(self._idle_readers) < READER_POOL_SIZE:
+                    self._idle_readers.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        """Stop the writer thread and close the writer and idle reader connections.
+
+        Readers still lent out are closed when they are handed back.
+        """
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._jobs.put(None)
+            readers, self._idle_readers = self._idle_readers, []
+        self._thread.join()
+        for conn in readers:
+            conn.close()
+        self.writer.close()
 
 
 class Database:
     def __init__(self, db_name: str = "library.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        self.pool = ConnectionPool(db_name)
         self.create_tables()
 
+    def close(self):
+        self.pool.close()
+
     # -------------------- TABLE CREATION --------------------
     def create_tables(self):
         """Create all required tables if they don't exist."""
-        with self.conn:
-            self.conn.execute("""
+        def create(conn):
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS books (
                     book_id TEXT PRIMARY KEY,
-                    title TEXT,
-                    author TEXT,
+                    title TEXT COLLATE NOCASE,
+                    author TEXT COLLATE NOCASE,
                     available INTEGER
                 )
             """)
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS members (
                     member_id TEXT PRIMARY KEY,
                     name TEXT
                 )
             """)
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS borrowed_books (
                     member_id TEXT,
                     book_id TEXT,
@@ -33,140 +191,161 @@ class Database:
                     FOREIGN KEY(book_id) REFERENCES books(book_id)
                 )
             """)
+            # join/delete lookups on borrowed_books and the available-books listing
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_bb_member ON borrowed_books(member_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_bb_book ON borrowed_books(book_id)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_books_available ON books(available) WHERE available = 1"
+            )
+            conn.execute(SQL_CREATE_BORROWED_VIEW)
+            self.create_search_index(conn)
+        self.pool.write(create)
+
+    def create_search_index(self, conn):
+        """Mirror books(title, author) into an FTS5 index kept in sync by triggers.
+
+        The index is keyed on books.rowid, so rebuild it after a VACUUM.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                title, author, content='books', content_rowid='rowid', tokenize='trigram'
+            )
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+                INSERT INTO books_fts(rowid, title, author) VALUES (new.rowid, new.title, new.author);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, author)
+                VALUES ('delete', old.rowid, old.title, old.author);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, author)
+                VALUES ('delete', old.rowid, old.title, old.author);
+                INSERT INTO books_fts(rowid, title, author) VALUES (new.rowid, new.title, new.author);
+            END
+        """)
+        if not exists:
+            # index books that were stored before the FTS table existed
+            conn.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
 
     # -------------------- BOOKS --------------------
     def add_book(self, book: Dict):
         """Add a new book to the library."""
-        with self.conn:
-            self.conn.execute(
-                "INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, ?)",
-                (book["book_id"], book["title"], book["author"], int(book.get("available", True))),
-            )
+        params = (book["book_id"], book["title"], book["author"], int(book.get("available", True)))
+        self.pool.write(lambda conn: conn.execute(SQL_INSERT_BOOK, params))
 
-    def remove_book(self, book_id: str):
-        """Remove a book by ID."""
-        with self.conn:
-            self.conn.execute("DELETE FROM books WHERE book_id = ?", (book_id,))
+    def add_books_bulk(self, books: List[Dict]):
+        """Add many books in a single transaction."""
+        params = [(b["book_id"], b["title"], b["author"], 1) for b in books]
+        self.pool.write(lambda conn: conn.executemany(SQL_INSERT_BOOK, params))
+
+    def remove_book(self, book_id: str) -> bool:
+        """Remove a book by ID; returns False if there was no such book."""
+        return bool(self.pool.write(lambda conn: conn.execute(SQL_DELETE_BOOK, (book_id,)).fetchall()))
 
     def get_books(self) -> List[Dict]:
         """Return all books."""
-        cursor = self.conn.execute("SELECT * FROM books")
-        rows = cursor.fetchall()
-        return [        
-            {"book_id": row[0], "title": row[1], "author": row[2], "available": bool(row[3])}
-            for row in rows
-        ]
+        with self.pool.reader() as conn:
+            rows = conn.execute(SQL_GET_BOOKS).fetchall()
+        return [dict(row, available=bool(row["available"])) for row in rows]
+
+    def iter_books(self) -> Iterator[Dict]:
+        """Yield all books straight from the cursor without fetching them all first."""
+        with self.pool.reader() as conn:
+            cursor = conn.execute(SQL_GET_BOOKS)
+            try:
+                for row in cursor:
+                    yield dict(row, available=bool(row["available"]))
+            finally:
+                cursor.close()  # finish the statement before the connection goes back
 
     def search_books(self, query: str):
         """Search books by title or author (case-insensitive)."""
-        cursor = self.conn.execute("""
-            SELECT * FROM books
-            WHERE LOWER(title) LIKE ? OR LOWER(author) LIKE ?
-        """, (f"%{query.lower()}%", f"%{query.lower()}%"))
-        rows = cursor.fetchall()
-        return [
-            {"book_id": r[0], "title": r[1], "author": r[2], "available": bool(r[3])}
-            for r in rows
-        ]
+        if len(query) >= FTS_MIN_QUERY:
+            # quoted as one phrase so user input is never parsed as FTS syntax
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql, params = SQL_SEARCH_BOOKS_FTS, (phrase,)
+        else:
+            # too short for trigrams; LIKE already folds ASCII case, so no LOWER()
+            # escape LIKE wildcards so % and _ match literally, as they do in FTS
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            sql, params = SQL_SEARCH_BOOKS, (pattern, pattern)
+        with self.pool.reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(r, available=bool(r["available"])) for r in rows]
 
 
     def get_available_books(self) -> List[Dict]:
         """Return all books that are available."""
-        cursor = self.conn.execute("SELECT * FROM books WHERE available = 1")
-        rows = cursor.fetchall()
-        return [
-            {"book_id": row[0], "title": row[1], "author": row[2], "available": True}
-            for row in rows
-        ]
+        with self.pool.reader() as conn:
+            rows = conn.execute(SQL_GET_AVAILABLE_BOOKS).fetchall()
+        return [dict(row, available=True) for row in rows]
 
     def find_book(self, book_id: str) -> Optional[Dict]:
         """Find a specific book by ID."""
-        cursor = self.conn.execute("SELECT * FROM books WHERE book_id=?", (book_id,))
-        row = cursor.fetchone()
-        return (
-            {"book_id": row[0], "title": row[1], "author": row[2], "available": bool(row[3])}
-            if row else None
-        )
+        with self.pool.reader() as conn:
+            row = conn.execute(SQL_FIND_BOOK, (book_id,)).fetchone()
+        return dict(row, available=bool(row["available"])) if row else None
 
 
     def update_book_availability(self, book_id: str, available: bool):
         """Mark a book as available or unavailable."""
-        with self.conn:
-            self.conn.execute(
-                "UPDATE books SET available = ? WHERE book_id = ?",
-                (int(available), book_id)
-            )
+        self.pool.write(lambda conn: conn.execute(SQL_UPDATE_AVAILABILITY, (int(available), book_id)))
 
     # -------------------- MEMBERS --------------------
     def add_member(self, member: Dict):
         """Add a new library member."""
-        with self.conn:
-            self.conn.execute(
-                "INSERT INTO members (member_id, name) VALUES (?, ?)",
-                (member["member_id"], member["name"]),
-            )
+        params = (member["member_id"], member["name"])
+        self.pool.write(lambda conn: conn.execute(SQL_INSERT_MEMBER, params))
 
     def get_members(self) -> List[Dict]:
         """Return all library members."""
-        cursor = self.conn.execute("SELECT * FROM members")
-        rows = cursor.fetchall()
-        return [{"member_id": row[0], "name": row[1]} for row in rows]
+        with self.pool.reader() as conn:
+            rows = conn.execute(SQL_GET_MEMBERS).fetchall()
+        return [dict(row) for row in rows]
 
     def find_member(self, member_id: str) -> Optional[Dict]:
         """Find a specific member by ID."""
-        cursor = self.conn.execute("SELECT * FROM members WHERE member_id=?", (member_id,))
-        row = cursor.fetchone()
-        return {"member_id": row[0], "name": row[1]} if row else None
-    
-    def get_borrowed_books(self):
-        """Return list of borrowed books with member info."""
-        cursor = self.conn.execute("""
-            SELECT members.member_id, members.name, books.book_id, books.title, books.author
-            FROM borrowed_books
-            JOIN members ON borrowed_books.member_id = members.member_id
-            JOIN books ON borrowed_books.book_id = books.book_id
-        """)
-        rows = cursor.fetchall()
-        return [
-            {
-                "member_id": r[0],
-                "member_name": r[1],
-                "book_id": r[2],
-                "title": r[3],
-                "author": r[4]
-            }
-            for r in rows
-        ]
-
+        with self.pool.reader() as conn:
+            row = conn.execute(SQL_FIND_MEMBER, (member_id,)).fetchone()
+        return dict(row) if row else None
 
     # -------------------- BORROW / RETURN --------------------
+    def borrow_book(self, member_id: str, book_id: str) -> bool:
+        """Atomically lend an available book to an existing member.
 
+        Returns False and changes nothing if the member is unknown or the book
+        is missing or already borrowed.
+        """
+        def borrow(conn):
+            if not conn.execute(SQL_MARK_BORROWED, (book_id,)).fetchall():
+                return False
+            if conn.execute(SQL_INSERT_BORROWED, (book_id, member_id)).rowcount == 0:
+                conn.rollback()
+                return False
+            return True
+        return self.pool.write(borrow)
 
-    def return_book(self, member_id: str, book_id: str):
-        """Record that a member returned a book."""
-        with self.conn:
-            self.conn.execute(
-                "DELETE FROM borrowed_books WHERE member_id = ? AND book_id = ?",
-                (member_id, book_id),
-            )
-            self.update_book_availability(book_id, True)
+    def return_book(self, member_id: str, book_id: str) -> bool:
+        """Atomically take back a book; returns False if the member had not borrowed it."""
+        def give_back(conn):
+            if not conn.execute(SQL_DELETE_BORROWED, (member_id, book_id)).fetchall():
+                return False
+            conn.execute(SQL_UPDATE_AVAILABILITY, (1, book_id))
+            return True
+        return self.pool.write(give_back)
 
     def get_borrowed_books(self) -> List[Dict]:
         """List all borrowed books with member info."""
-        cursor = self.conn.execute("""
-            SELECT b.book_id, b.title, b.author, m.member_id, m.name
-            FROM borrowed_books bb
-            JOIN books b ON bb.book_id = b.book_id
-            JOIN members m ON bb.member_id = m.member_id
-        """)
-        rows = cursor.fetchall()
-        return [
-            {
-                "book_id": row[0],
-                "title": row[1],
-                "author": row[2],
-                "member_id": row[3],
-                "member_name": row[4],
-            }
-            for row in rows
-        ]
+        with self.pool.reader() as conn:
+            rows = conn.execute(SQL_GET_BORROWED).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,12 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# One process by default: the response cache and the SQLite writer thread live
+# per process, so with more workers a write on one leaves cached book lists on
+# the others stale until the cache TTL expires. Threads already overlap SQLite
+# reads because sqlite3 releases the GIL while a query runs.
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+# no preload_app: each worker must open its own Database and writer thread after fork
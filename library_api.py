@@ -1,13 +1,119 @@
-from flask import Flask, jsonify, request
+import sqlite3
+import threading
+
+import orjson
+from cachetools import TTLCache
+from flask import Blueprint, Flask, Response, request, stream_with_context
+from werkzeug.exceptions import BadRequest
 from database import Database
 
 app = Flask(__name__) #create instance 
+# "/books/" matches "/books" directly instead of costing a 308 redirect round-trip
+app.url_map.strict_slashes = False
+api = Blueprint("api", __name__)
 db = Database("library.db") 
 
+# ---------------------- JSON Responses ----------------------
+def json_response(obj):
+    """Serialize with orjson and hand the bytes straight to Flask."""
+    return Response(orjson.dumps(obj), mimetype="application/json")
+
+
+def request_json():
+    """Parse the request body with orjson; malformed JSON is a 400, as with get_json()."""
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        raise BadRequest("Request body is not valid JSON")
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def json_stream(rows):
+    """Yield a JSON array of rows in ~64 KiB chunks without building the full list."""
+    buf = bytearray(b"[")
+    sep = b""
+    for row in rows:
+        buf += sep
+        buf += orjson.dumps(row)
+        sep = b","
+        if len(buf) >= STREAM_CHUNK_SIZE:
+            yield bytes(buf)
+            buf.clear()
+    buf += b"]"
+    yield bytes(buf)
+
+# ---------------------- Response Cache ----------------------
+# serialized GET /books* bodies keyed by endpoint + query; every book write clears it
+_cache = TTLCache(maxsize=256, ttl=30)
+_cache_lock = threading.Lock()
+_cache_generation = 0
+# streamed bodies larger than this are sent but not kept in the cache
+CACHE_MAX_BODY = 1024 * 1024
+
+
+def cache_key():
+    # endpoint rather than raw path, so "/books" and "/books/" share an entry
+    return request.endpoint, request.query_string
+
+
+def cache_lookup(key):
+    """Return (cached body or None, current cache generation)."""
+    with _cache_lock:
+        return _cache.get(key), _cache_generation
+
+
+def cache_store(key, generation, body):
+    with _cache_lock:
+        # skip the fill if a write invalidated the cache while we were reading
+        if generation == _cache_generation:
+            _cache[key] = body
+
+
+def cached_json(fetch):
+    """Return the cached JSON body for this request, or build and cache it from fetch()."""
+    key = cache_key()
+    body, generation = cache_lookup(key)
+    if body is None:
+        body = orjson.dumps(fetch())
+        cache_store(key, generation, body)
+    return Response(body, mimetype="application/json")
+
+
+def cached_json_stream(rows):
+    """Like cached_json, but streams a cache miss and caches it only if it stays small."""
+    key = cache_key()
+    body, generation = cache_lookup(key)
+    if body is not None:
+        return Response(body, mimetype="application/json")
+
+    def generate():
+        chunks, size = [], 0
+        for chunk in json_stream(rows()):
+            yield chunk
+            if chunks is not None:
+                size += len(chunk)
+                if size > CACHE_MAX_BODY:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+        if chunks is not None:
+            cache_store(key, generation, b"".join(chunks))
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+def invalidate_cache():
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        _cache.clear()
+
 # ---------------------- 1. Add Book ----------------------
-@app.route("/books", methods=["POST"])
+@api.route("/books", methods=["POST"])
 def add_book():
-    data = request.get_json()
+    data = request_json()
     try:
         db.add_book({
             "book_id": data["book_id"],
@@ -15,105 +121,116 @@ def add_book():
             "author": data["author"],
             "available": True
         })
-        return jsonify({"message": "Book added", "book": data}), 201
+        invalidate_cache()
+        return json_response({"message": "Book added", "book": data}), 201
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return json_response({"error": str(e)}), 400
+
+# ---------------------- 1b. Bulk Add Books ----------------------
+@api.route("/books/bulk", methods=["POST"])
+def add_books_bulk():
+    data = request_json()
+    if not isinstance(data, list):
+        return json_response({"error": "Expected a JSON array of books"}), 400
+    try:
+        db.add_books_bulk(data)
+        invalidate_cache()
+        return json_response({"message": "Books added", "count": len(data)}), 201
+    except Exception as e:
+        return json_response({"error": str(e)}), 400
 
 # ---------------------- 2. Remove Book ----------------------
-@app.route("/books/<book_id>", methods=["DELETE"])
+@api.route("/books/<book_id>", methods=["DELETE"])
 def remove_book(book_id):
     try:
-        book = db.find_book(book_id)
-        if not book:
-            return jsonify({"error": "Book not found"}), 404
-        db.remove_book(book_id)
-        return jsonify({"message": "Book removed"})
+        if not db.remove_book(book_id):
+            return json_response({"error": "Book not found"}), 404
+        invalidate_cache()
+        return json_response({"message": "Book removed"})
+    except sqlite3.IntegrityError:
+        # borrowed_books still references it (foreign keys are enforced)
+        return json_response({"error": "Book is currently borrowed"}), 409
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return json_response({"error": str(e)}), 400
 
 
 
 # ---------------------- 3. Register Member ----------------------
-@app.route("/members", methods=["POST"])
+@api.route("/members", methods=["POST"])
 def register_member():
-    data = request.get_json()
+    data = request_json()
     try:
         db.add_member({
             "member_id": data["member_id"],
             "name": data["name"]
         })
-        return jsonify({"message": "Member added", "member": data}), 201
+        return json_response({"message": "Member added", "member": data}), 201
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return json_response({"error": str(e)}), 400
 
 # ---------------------- 4. Borrow Book ----------------------
-@app.route("/borrow", methods=["POST"])
+@api.route("/borrow", methods=["POST"])
 def borrow_book():
-    data = request.get_json()
+    data = request_json()
     member_id = data["member_id"]
     book_id = data["book_id"]
 
-    member = db.find_member(member_id)
-    book = db.find_book(book_id)
-
-    if not member:
-        return jsonify({"error": "Member not found"}), 404
-    if not book:
-        return jsonify({"error": "Book not found"}), 404
-    if not book["available"]:
-        return jsonify({"error": "Book not available"}), 400
-
-    # Mark as borrowed
-    with db.conn:
-        db.conn.execute(
-            "INSERT INTO borrowed_books (member_id, book_id) VALUES (?, ?)",
-            (member_id, book_id)
-        )
-    db.update_book_availability(book_id, False)
-    return jsonify({"message": "Book borrowed"})
+    if db.borrow_book(member_id, book_id):
+        invalidate_cache()
+        return json_response({"message": "Book borrowed"})
+
+    # nothing changed; look up why
+    if not db.find_member(member_id):
+        return json_response({"error": "Member not found"}), 404
+    if not db.find_book(book_id):
+        return json_response({"error": "Book not found"}), 404
+    return json_response({"error": "Book not available"}), 400
 
 # ---------------------- 5. Return Book ----------------------
-@app.route("/return", methods=["POST"])
+@api.route("/return", methods=["POST"])
 def return_book():
-    data = request.get_json()
+    data = request_json()
     member_id = data["member_id"]
     book_id = data["book_id"]
 
-    member = db.find_member(member_id)
-    book = db.find_book(book_id)
+    if db.return_book(member_id, book_id):
+        invalidate_cache()
+        return json_response({"message": "Book returned"})
 
-    if not member or not book:
-        return jsonify({"error": "Member or Book not found"}), 404
-
-    db.return_book(member_id, book_id)
-    return jsonify({"message": "Book returned"})
+    if not db.find_member(member_id) or not db.find_book(book_id):
+        return json_response({"error": "Member or Book not found"}), 404
+    return json_response({"error": "Book not borrowed by this member"}), 400
 
 # ---------------------- 6. List All Books ----------------------
-@app.route("/books", methods=["GET"])
+@api.route("/books", methods=["GET"])
 def get_books():
-    return jsonify(db.get_books())
+    return cached_json_stream(db.iter_books)
 
 # ---------------------- 7. List Available Books ----------------------
-@app.route("/books/available", methods=["GET"])
+@api.route("/books/available", methods=["GET"])
 def get_available_books():
-    return jsonify(db.get_available_books())
+    return cached_json(db.get_available_books)
 
 # ---------------------- 8. Search Books ----------------------
-@app.route("/books/search", methods=["GET"])
+@api.route("/books/search", methods=["GET"])
 def search_books():
     q = request.args.get("q", "")
-    return jsonify(db.search_books(q))
+    return cached_json(lambda: db.search_books(q))
 
 # ---------------------- 9. List Members ----------------------
-@app.route("/members", methods=["GET"])
+@api.route("/members", methods=["GET"])
 def list_members():
-    return jsonify(db.get_members())
+    return json_response(db.get_members())
 
 # ---------------------- 10. List Borrowed Books ----------------------
-@app.route("/borrowed", methods=["GET"])
+@api.route("/borrowed", methods=["GET"])
 def list_borrowed():
-    return jsonify(db.get_borrowed_books())
+    return json_response(db.get_borrowed_books())
+
+app.register_blueprint(api)
 
 # ---------------------- Run Server ----------------------
+# development only; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
 if __name__ == "__main__":
-    app.run(debug=True)
+    # the dev server runs each request on a new thread; reads share the bounded reader pool
+    app.run()
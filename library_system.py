@@ -1,304 +1,460 @@
 from __future__ import annotations
 import json  #read/write json data
-from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import compress, islice
 from contextlib import contextmanager
 from dataclasses import dataclass # __init__, __eq__
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Set
 import os
 import sys # cmd
 import functools
+import logging
+import threading
+import time
 import unittest
 
-class LibraryError(Exception):
-    """Base exception for library errors."""
+try:
+    import orjson  # native encoder; stdlib json is the fallback
+except ImportError:
+    orjson = None
 
-class BookNotAvailableError(LibraryError):
-    pass
+# the models used to be defined here; Person and Librarian are re-exported so
+# `from library_system import ...` keeps working for existing callers
+from models.book import Book
+from models.person import Person, Member, Librarian  # noqa: F401
+from models.exceptions import LibraryError, BookNotAvailableError, BookNotFoundError, MemberNotFoundError
 
-class BookNotFoundError(LibraryError):
-    pass
-
-class MemberNotFoundError(LibraryError):
-    pass
+logger = logging.getLogger(__name__)
 
 def logged(func):
-    """Simple decorator that logs entry/exit of a function."""
+    """Decorator that logs entry/exit of a function at DEBUG level.
+
+    Only active when the LMS_TRACE environment variable is set; otherwise the
+    function is returned undecorated and tracing costs nothing.
+    """
+    if not os.environ.get("LMS_TRACE"):
+        return func
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        print(f"[LOG] Calling {func.__name__}")
+        logger.debug("Calling %s", func.__name__)
         result = func(*args, **kwargs)
-        print(f"[LOG] Finished {func.__name__}")
+        logger.debug("Finished %s", func.__name__)
         return result
     return wrapper
 
+def json_dumps(obj: Any) -> bytes:
+    """Serialize to compact, single-line UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+def json_loads(raw: bytes) -> Any:
+    """Parse JSON bytes; both backends raise json.JSONDecodeError on bad input."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 # small context manager for file operations (demonstration)
 @contextmanager
 def atomic_write(path: str, mode: str = "w"):
     """Context manager that writes to a temp file and then renames it.
-    Safer write for persistence.
+    Safer write for persistence: the temp file is fsynced before the rename,
+    and if the block raises, the original file is left untouched.
     """
     tmp = f"{path}.tmp"
+    f = open(tmp, mode, encoding=None if "b" in mode else "utf-8")
     try:
-        f = open(tmp, mode, encoding="utf-8")
         yield f
-    finally:
-        try:
-            f.close()
-            os.replace(tmp, path)
-        except Exception:
-            if os.path.exists(tmp):
-                os.remove(tmp)
-
-class Book:
-    """Represents a book in the library."""
-
-    def __init__(self, book_id: str, title: str, author: str, available: bool = True):
-        self.book_id = book_id
-        self.title = title
-        self.author = author
-        self._available = available
-
-    @property
-    def book_id(self) -> str:
-        return self._book_id
-
-    @book_id.setter
-    def book_id(self, value: Any) -> None:
-        if value is None or str(value).strip() == "":
-            raise ValueError("book_id cannot be empty")
-        self._book_id = str(value)
-
-    @property
-    def title(self) -> str:
-        return self._title
-
-    @title.setter
-    def title(self, value: str) -> None:
-        if not isinstance(value, str) or value.strip() == "":
-            raise ValueError("title must be a non-empty string")
-        self._title = value.strip()
-
-    @property
-    def author(self) -> str:
-        return self._author
-
-    @author.setter
-    def author(self, value: str) -> None:
-        if not isinstance(value, str) or value.strip() == "":
-            raise ValueError("author must be a non-empty string")
-        self._author = value.strip()
-
-    @property
-    def available(self) -> bool:
-        return self._available
-
-    def borrow(self) -> None:
-        """Mark book as borrowed; raise if not available."""
-        if not self._available:
-            raise BookNotAvailableError(f"Book '{self.title}' is not available")
-        self._available = False
-
-    def return_book(self) -> None:
-        """Mark book as returned."""
-        self._available = True
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {"book_id": self.book_id, "title": self.title, "author": self.author, "available": self.available}
-
-    @classmethod
-    def from_dict(cls, d: Dict[str, Any]) -> "Book":
-        return cls(d["book_id"], d["title"], d["author"], d.get("available", True))
-
-    # operator overloading
-    def __eq__(self, other: object) -> bool:
-        if not isinstance(other, Book):
-            return NotImplemented
-        return self.book_id == other.book_id
-
-    def __lt__(self, other: "Book") -> bool:
-        return self.title.lower() < other.title.lower()
-
-    def __repr__(self) -> str:
-        return f"Book({self.book_id!r}, {self.title!r}, {self.author!r}, available={self.available})"
-
-
-class Person(ABC):
-    """Abstract base for people in the library."""
-
-    def __init__(self, name: str, person_id: str):
-        self._name = name
-        self._person_id = str(person_id)
-
-    @abstractmethod
-    def get_role(self) -> str:
-        pass
-
-    @property
-    def name(self) -> str:
-        return self._name
-
-    @property
-    def person_id(self) -> str:
-        return self._person_id
-
-
-class Member(Person):
-    """Library member who can borrow books."""
-
-    def __init__(self, name: str, member_id: str):
-        super().__init__(name, member_id)
-        self.borrowed_books: List[str] = []
-
-    def get_role(self) -> str:
-        return "Member"
-
-    def borrow_book(self, book: Book) -> None:
-        if book.book_id in self.borrowed_books:
-            # already borrowed
-            return
-        self.borrowed_books.append(book.book_id)
-
-    def return_book(self, book: Book) -> None:
-        if book.book_id in self.borrowed_books:
-            self.borrowed_books.remove(book.book_id)
-
-    def __add__(self, other: "Member") -> "Member":
-        if not isinstance(other, Member):
-            return NotImplemented
-        merged = Member(f"{self.name}&{other.name}", f"{self.person_id}+{other.person_id}")
-        merged.borrowed_books = list(set(self.borrowed_books + other.borrowed_books))
-        return merged
-
-    def __repr__(self) -> str:
-        return f"Member({self.name!r}, {self.person_id!r}, borrowed={self.borrowed_books!r})"
-
-
-class Librarian(Person):
-    """Library staff."""
-
-    def get_role(self) -> str:
-        return "Librarian"
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(tmp, path)
+    except BaseException:
+        f.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def trigrams(text: str) -> Set[str]:
+    """All 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
 
 # -------------------- Library Class --------------------
 class Library:
-    """Main library manager handling books, members, and persistence."""
+    """Main library manager handling books, members, and persistence.
+
+    Mutations are appended to ``<data_file>.wal`` as one JSON line each;
+    the full JSON snapshot is only rewritten every ``snapshot_every`` events
+    (by a background thread) and on ``close()``. Mutating methods are safe to
+    call from several threads.
+    """
 
-    def __init__(self, data_file: str = "library_data.json") -> None:
+    FLUSH_DELAY = 0.05  # seconds the snapshot thread waits so a burst shares one write
+
+    def __init__(self, data_file: str = "library_data.json", snapshot_every: int = 100) -> None:
         self.data_file = data_file
+        self.wal_file = f"{data_file}.wal"
+        self.snapshot_every = snapshot_every
         self.books: List[Book] = []
         self.members: List[Member] = []
+        # id -> object, kept in step with the lists for O(1) lookups
+        self._book_index: Dict[str, Book] = {}
+        self._member_index: Dict[str, Member] = {}
+        # availability of books[i] as one byte each, plus id -> i to update it
+        self._available_mask = bytearray()
+        self._book_pos: Dict[str, int] = {}
+        # trigram of lowercased title/author -> ids of books containing it
+        self._trigram_index: Dict[str, Set[str]] = defaultdict(set)
+        # id -> "title\0author" lowercased; the one column search scans
+        self._search_text: Dict[str, str] = {}
+        # (blob, offsets, ids): every search text joined by "\0", rebuilt lazily
+        self._search_blob: Optional[tuple] = None
+        # next free numeric suffix for generated "B<n>" / "M<n>" ids
+        self._next_book_num = 1
+        self._next_member_num = 1
+        self._wal_seq = 0  # sequence number of the last applied event
+        self._pending = 0  # events logged since the last snapshot
+        self._lock = threading.RLock()
+        self._dirty = threading.Event()  # set when a snapshot is due
+        self._closing = False
         self.load_data()
+        # raw O_APPEND descriptor: each event is a single unbuffered write()
+        self._wal_fd = os.open(self.wal_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self._wal_fd).st_size:
+            # fold replayed events (and any torn last line) into a fresh snapshot
+            self.snapshot()
+        self._flusher = threading.Thread(target=self._flush_loop, name="library-snapshot", daemon=True)
+        self._flusher.start()
 
     def next_book_id(self):
-        numbers = []
-        for b in self.books:
-            if b.book_id.startswith("B") and b.book_id[1:].isdigit():
-                numbers.append(int(b.book_id[1:]))
-        if not numbers:
-            return "B1"
-        return f"B{max(numbers) + 1}"
-
+        return f"B{self._next_book_num}"
 
     def next_member_id(self):
-        numbers = []
-        for m in self.members:
-            if m.person_id.startswith("M") and m.person_id[1:].isdigit():
-                numbers.append(int(m.person_id[1:]))
-        if not numbers:
-            return "M1"
-        return f"M{max(numbers) + 1}"
+        return f"M{self._next_member_num}"
 
 
     # persistence
     @logged
     def save_data(self) -> None:
-        data = {
-            "books": [b.to_dict() for b in self.books],
-            "members": [{"name": m.name, "member_id": m.person_id, "borrowed_books": m.borrowed_books} for m in self.members],
-        }
-        # use atomic_write context manager
-        with atomic_write(self.data_file, "w") as f:
-            json.dump(data, f, indent=4)    
+        """Write the snapshot as JSON lines: a header, then one line per book and per member."""
+        header = {"type": "header", "version": 2, "wal_seq": self._wal_seq,
+                  "books": len(self.books), "members": len(self.members)}
+        # each record is encoded on its own into one buffer, so the file still gets a single write()
+        buf = bytearray(json_dumps(header))
+        buf += b"\n"
+        for b in self.books:
+            buf += json_dumps(b.to_dict())
+            buf += b"\n"
+        for m in self.members:
+            buf += json_dumps({"name": m.name, "member_id": m.person_id, "borrowed_books": sorted(m.borrowed_books)})
+            buf += b"\n"
+        with atomic_write(self.data_file, "wb") as f:
+            f.write(buf)
 
     @logged
     def load_data(self) -> None:
-        if not os.path.exists(self.data_file):
-            return
-        with open(self.data_file, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                return
+        if os.path.exists(self.data_file):
+            with open(self.data_file, "rb") as f:
+                first = f.readline()
+                try:
+                    header = json_loads(first)
+                except json.JSONDecodeError:
+                    header = None
+                if isinstance(header, dict) and header.get("type") == "header":
+                    self._load_records(header, f)
+                else:
+                    self._load_legacy(first + f.read())
+        self._replay_wal()
+
+    def _load_records(self, header: Dict[str, Any], f) -> None:
+        """Read the book and member lines that follow a version 2 snapshot header."""
+        self._wal_seq = header.get("wal_seq", 0)
+        self.books = [Book.from_dict(json_loads(line)) for line in islice(f, header.get("books", 0))]
+        self.members = []
+        for line in islice(f, header.get("members", 0)):
+            mdata = json_loads(line)
+            member = Member(mdata["name"], mdata["member_id"])
+            member.borrowed_books = set(mdata.get("borrowed_books", []))
+            self.members.append(member)
+        self._reindex()
+
+    def _load_legacy(self, raw: bytes) -> None:
+        """Read a snapshot written as one JSON object (the format before version 2)."""
+        try:
+            data = json_loads(raw)
+        except json.JSONDecodeError:
+            data = {}
+        self._wal_seq = data.get("wal_seq", 0)
         self.books = [Book.from_dict(d) for d in data.get("books", [])]
         self.members = [Member(m["name"], m["member_id"]) for m in data.get("members", [])]
         # restore borrowed lists
-        member_map = {m.person_id: m for m in self.members}
+        self._reindex()
         for mdata in data.get("members", []):
             mid = mdata.get("member_id")
-            if mid in member_map:
-                member_map[mid].borrowed_books = mdata.get("borrowed_books", [])
+            if mid in self._member_index:
+                self._member_index[mid].borrowed_books = set(mdata.get("borrowed_books", []))
+
+    def _reindex(self) -> None:
+        self._book_index = {b.book_id: b for b in self.books}
+        self._member_index = {m.person_id: m for m in self.members}
+        self._available_mask = bytearray(b.available for b in self.books)
+        self._book_pos = {b.book_id: i for i, b in enumerate(self.books)}
+        self._trigram_index = defaultdict(set)
+        self._search_text = {}
+        self._search_blob = None
+        for b in self.books:
+            self._index_text(b)
+        self._next_book_num = 1
+        self._next_member_num = 1
+        for b in self.books:
+            self._track_book_id(b)
+        for m in self.members:
+            self._track_member_id(m)
+
+    def _track_book_id(self, book: Book) -> None:
+        num = book._num
+        if num is not None and num >= self._next_book_num:
+            self._next_book_num = num + 1
+
+    def _track_member_id(self, member: Member) -> None:
+        num = member._num
+        if num is not None and num >= self._next_member_num:
+            self._next_member_num = num + 1
+
+    def _index_text(self, book: Book) -> None:
+        self._search_text[book.book_id] = f"{book._title_lc}\0{book._author_lc}"
+        self._search_blob = None
+        for gram in trigrams(book._title_lc) | trigrams(book._author_lc):
+            self._trigram_index[gram].add(book.book_id)
+
+    def _unindex_text(self, book: Book) -> None:
+        del self._search_text[book.book_id]
+        self._search_blob = None
+        for gram in trigrams(book._title_lc) | trigrams(book._author_lc):
+            postings = self._trigram_index.get(gram)
+            if postings is not None:
+                postings.discard(book.book_id)
+                if not postings:
+                    del self._trigram_index[gram]
+
+    def _replay_wal(self) -> None:
+        """Re-apply logged events newer than the snapshot."""
+        if not os.path.exists(self.wal_file):
+            return
+        with open(self.wal_file, "rb") as f:
+            for line in f:
+                try:
+                    event = json_loads(line)
+                except json.JSONDecodeError:
+                    break  # torn write from a crash; nothing after it was committed
+                if event["seq"] <= self._wal_seq:
+                    continue  # already in the snapshot
+                self._apply(event)
+                self._wal_seq = event["seq"]
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        op = event["op"]
+        if op == "add_book":
+            self._add_book(Book.from_dict(event["book"]))
+        elif op == "remove_book":
+            self._remove_book(event["book_id"])
+        elif op == "register_member":
+            self._register_member(Member(event["name"], event["member_id"]))
+        elif op == "borrow":
+            self._borrow_book(event["member_id"], event["book_id"])
+        elif op == "return":
+            self._return_book(event["member_id"], event["book_id"])
+
+    def _log(self, event: Dict[str, Any]) -> None:
+        """Append an already-applied mutation to the WAL; snapshot every few events."""
+        self._wal_seq += 1
+        event["seq"] = self._wal_seq
+        os.write(self._wal_fd, json_dumps(event) + b"\n")
+        self._pending += 1
+        if self._pending >= self.snapshot_every:
+            self._dirty.set()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            if self._closing:
+                return
+            time.sleep(self.FLUSH_DELAY)
+            self._dirty.clear()
+            with self._lock:
+                if self._closing:
+                    return
+                self.snapshot()
+
+    def snapshot(self) -> None:
+        """Write the full state to data_file and empty the WAL."""
+        with self._lock:
+            self.save_data()
+            os.ftruncate(self._wal_fd, 0)
+            self._pending = 0
+
+    def close(self) -> None:
+        """Snapshot any logged events, stop the snapshot thread and close the WAL."""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            self._dirty.set()
+            if self._pending:
+                self.snapshot()
+            os.fsync(self._wal_fd)
+            os.close(self._wal_fd)
+            self._wal_fd = -1  # the number may be reused by the next open()
+        if threading.current_thread() is not self._flusher:
+            self._flusher.join()
+
+    def _check_open(self) -> None:
+        if self._closing:
+            raise LibraryError("library is closed")
 
     def add_book(self, book: Book) -> None:
-        if any(b.book_id == book.book_id for b in self.books):
+        with self._lock:
+            self._check_open()
+            self._add_book(book)
+            self._log({"op": "add_book", "book": book.to_dict()})
+
+    def _add_book(self, book: Book) -> None:
+        if book.book_id in self._book_index:
             raise ValueError("Book with that ID already exists")
+        self._book_pos[book.book_id] = len(self.books)
         self.books.append(book)
-        self.save_data()
+        self._available_mask.append(book.available)
+        self._book_index[book.book_id] = book
+        self._index_text(book)
+        self._track_book_id(book)
 
     def remove_book(self, book_id: str) -> None:
-        for b in list(self.books):
-            if b.book_id == str(book_id):
-                self.books.remove(b)
-                self.save_data()
-                return
-        raise BookNotFoundError("Book not found")
+        book_id = str(book_id)
+        with self._lock:
+            self._check_open()
+            self._remove_book(book_id)
+            self._log({"op": "remove_book", "book_id": book_id})
+
+    def _remove_book(self, book_id: str) -> None:
+        book = self._book(book_id)
+        del self._book_index[book_id]
+        self._unindex_text(book)
+        i = self._book_pos.pop(book_id)
+        del self.books[i]
+        del self._available_mask[i]
+        for b in self.books[i:]:
+            self._book_pos[b.book_id] -= 1
 
     def register_member(self, member: Member) -> None:
-        if any(m.person_id == member.person_id for m in self.members):
+        with self._lock:
+            self._check_open()
+            self._register_member(member)
+            self._log({"op": "register_member", "name": member.name, "member_id": member.person_id})
+
+    def _register_member(self, member: Member) -> None:
+        if member.person_id in self._member_index:
             raise ValueError("Member with that ID already exists")
         self.members.append(member)
-        self.save_data()
+        self._member_index[member.person_id] = member
+        self._track_member_id(member)
 
     def find_book(self, book_id: str) -> Book:
-        for b in self.books:
-            if b.book_id == str(book_id):
-                return b
-        raise BookNotFoundError("Book not found")
+        return self._book(str(book_id))
 
     def find_member(self, member_id: str) -> Member:
-        for m in self.members:
-            if m.person_id == str(member_id):
-                return m
-        raise MemberNotFoundError("Member not found")
+        return self._member(str(member_id))
+
+    # lookups for ids that are already str (coerced once by the public methods)
+    def _book(self, book_id: str) -> Book:
+        try:
+            return self._book_index[book_id]
+        except KeyError:
+            raise BookNotFoundError("Book not found") from None
+
+    def _member(self, member_id: str) -> Member:
+        try:
+            return self._member_index[member_id]
+        except KeyError:
+            raise MemberNotFoundError("Member not found") from None
 
     @logged
     def borrow_book(self, member_id: str, book_id: str) -> None:
-        member = self.find_member(member_id)
-        book = self.find_book(book_id)
+        member_id, book_id = str(member_id), str(book_id)
+        with self._lock:
+            self._check_open()
+            self._borrow_book(member_id, book_id)
+            self._log({"op": "borrow", "member_id": member_id, "book_id": book_id})
+
+    def _borrow_book(self, member_id: str, book_id: str) -> None:
+        member = self._member(member_id)
+        book = self._book(book_id)
         book.borrow()
+        self._available_mask[self._book_pos[book_id]] = 0
         member.borrow_book(book)
-        self.save_data()
 
     @logged
     def return_book(self, member_id: str, book_id: str) -> None:
-        member = self.find_member(member_id)
-        book = self.find_book(book_id)
+        member_id, book_id = str(member_id), str(book_id)
+        with self._lock:
+            self._check_open()
+            self._return_book(member_id, book_id)
+            self._log({"op": "return", "member_id": member_id, "book_id": book_id})
+
+    def _return_book(self, member_id: str, book_id: str) -> None:
+        member = self._member(member_id)
+        book = self._book(book_id)
         book.return_book()
+        self._available_mask[self._book_pos[book_id]] = 1
         member.return_book(book)
-        self.save_data()
 
-    @staticmethod
-    def list_available_books(books: List[Book]) -> List[Book]:
-        """Return available books (demonstrates staticmethod)."""
-        return [b for b in books if b.available]
+    def list_available_books(self) -> List[Book]:
+        """Return available books, in catalog order, by filtering with the availability mask."""
+        with self._lock:
+            return list(compress(self.books, self._available_mask))
 
     @classmethod
     def from_file(cls, data_file: str) -> "Library":
         """Construct a Library instance pointing to a specific data file."""
         return cls(data_file)
 
+    def _scan_search_blob(self, q: str) -> List[str]:
+        """Ids of books whose search text contains q, found with str.find over one blob."""
+        with self._lock:
+            if self._search_blob is None:
+                ids = list(self._search_text)
+                offsets, pos = [], 0
+                for bid in ids:
+                    offsets.append(pos)
+                    pos += len(self._search_text[bid]) + 1
+                blob = "\0".join(self._search_text[bid] for bid in ids)
+                self._search_blob = (blob, offsets, ids)
+            blob, offsets, ids = self._search_blob
+        hits: List[str] = []
+        if not ids:
+            return hits
+        i = blob.find(q)
+        while i != -1:
+            k = bisect_right(offsets, i) - 1
+            hits.append(ids[k])
+            if k + 1 == len(offsets):
+                break
+            i = blob.find(q, offsets[k + 1])  # one hit per book is enough
+        return hits
+
     def search_books(self, query: str) -> List[Book]:
         q = query.lower()
-        matches = [b for b in self.books if q in b.title.lower() or q in b.author.lower()]
+        if "\0" in q:
+            return []  # would match across the title/author separator
+        with self._lock:
+            index = self._book_index
+            if len(q) >= 3:
+                # only books holding every trigram of q can contain it; check those
+                text = self._search_text
+                postings = [self._trigram_index.get(g, set()) for g in trigrams(q)]
+                matches = [index[bid] for bid in set.intersection(*postings) if q in text[bid]]
+            else:
+                matches = [index[bid] for bid in self._scan_search_blob(q)]
         return sorted(matches, key=lambda x: x.title)
 
 
@@ -329,87 +485,89 @@ def run_console(library: Library) -> None:
     while True:
         print(MENU)
         choice = prompt("Enter choice: ").strip()
+        # everything a menu action prints goes out in one write at the end
+        out: List[str] = []
         if choice == "1":  
             title = prompt("Title: ")
             author = prompt("Author: ")
             bid = library.next_book_id()  
             try:
                 library.add_book(Book(bid, title, author))
-                print(f"Book added with ID {bid}.")
+                out.append(f"Book added with ID {bid}.")
             except Exception as e:
-                print("Error:", e)
+                out.append(f"Error: {e}")
         elif choice == "2":
             bid = prompt("Book ID to remove: ")
             try:
                 library.remove_book(bid)
-                print("Removed.")
+                out.append("Removed.")
             except Exception as e:
-                print("Error:", e)
+                out.append(f"Error: {e}")
         elif choice == "3":  
             name = prompt("Name: ")
             mid = library.next_member_id()  
             try:
                 library.register_member(Member(name, mid))
-                print(f"Member registered with ID {mid}.")
+                out.append(f"Member registered with ID {mid}.")
             except Exception as e:
-                print("Error:", e)
+                out.append(f"Error: {e}")
         elif choice == "4":
             mid = prompt("Member ID: ")
             bid = prompt("Book ID: ")
             try:
                 library.borrow_book(mid, bid)
-                print("Borrowed.")
+                out.append("Borrowed.")
             except Exception as e:
-                print("Error:", e)
+                out.append(f"Error: {e}")
         elif choice == "5":
             mid = prompt("Member ID: ")
             bid = prompt("Book ID: ")
             try:
                 library.return_book(mid, bid)
-                print("Returned.")
+                out.append("Returned.")
             except Exception as e:
-                print("Error:", e)
+                out.append(f"Error: {e}")
         elif choice == "6":
-            for b in sorted(library.books):
-                print(b)
+            out.extend(map(str, sorted(library.books)))
         elif choice == "7":
-            for b in library.list_available_books(library.books):
-                print(b)
+            out.extend(map(str, library.list_available_books()))
         elif choice == "8":
             q = prompt("Search query: ")
-            for b in library.search_books(q):
-                print(b)
+            out.extend(map(str, library.search_books(q)))
 
         elif choice == "9":
-            print("\nAll Members:")
+            out.append("\nAll Members:")
             if not library.members:
-                print("No members registered.")
+                out.append("No members registered.")
+            book_index = library._book_index
             for m in library.members:
                 borrowed_titles = [
-                    library.find_book(bid).title
+                    book_index[bid].title
                     for bid in m.borrowed_books
-                    if any(b.book_id == bid for b in library.books)
+                    if bid in book_index
                 ]
-                print(f"Member: {m.name} ({m.person_id}) | Borrowed: {borrowed_titles or 'None'}")
+                out.append(f"Member: {m.name} ({m.person_id}) | Borrowed: {borrowed_titles or 'None'}")
 
         elif choice == "10":
-            print("\nBorrowed Books:")
+            out.append("\nBorrowed Books:")
             found = False
+            book_index = library._book_index
             for m in library.members:
                 for bid in m.borrowed_books:
-                    try:
-                        b = library.find_book(bid)
-                        print(f"Book '{b.title}' borrowed by {m.name} ({m.person_id})")
-                        found = True
-                    except BookNotFoundError:
-                        pass
+                    b = book_index.get(bid)
+                    if b is None:
+                        continue
+                    out.append(f"Book '{b.title}' borrowed by {m.name} ({m.person_id})")
+                    found = True
             if not found:
-                print("No borrowed books currently.")
+                out.append("No borrowed books currently.")
         elif choice == "11":
             print("Goodbye")
             break
         else:
-            print("Invalid choice")
+            out.append("Invalid choice")
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
 
 # -------------------- Unit Tests --------------------
 class TestLibrary(unittest.TestCase):
@@ -417,17 +575,20 @@ class TestLibrary(unittest.TestCase):
         # use a temp data file to avoid clobbering real data
         self.test_file = "test_library_data.json"
         # remove if exists
-        try:
-            os.remove(self.test_file)
-        except Exception:
-            pass
+        for path in (self.test_file, f"{self.test_file}.wal"):
+            try:
+                os.remove(path)
+            except Exception:
+                pass
         self.lib = Library(self.test_file)
 
     def tearDown(self):
-        try:
-            os.remove(self.test_file)
-        except Exception:
-            pass
+        self.lib.close()
+        for path in (self.test_file, self.lib.wal_file):
+            try:
+                os.remove(path)
+            except Exception:
+                pass
 
     def test_add_and_find_book(self):
         b = Book("1", "A Title", "An Author")
@@ -458,11 +619,156 @@ class TestLibrary(unittest.TestCase):
         matches = self.lib.search_books("python")
         self.assertEqual(len(matches), 1)
 
+    def test_wal_replay_restores_unsnapshotted_changes(self):
+        self.lib.add_book(Book("5", "WAL Title", "WAL Author"))
+        self.lib.register_member(Member("Carol", "m5"))
+        self.lib.borrow_book("m5", "5")
+        # reopen without close(): state must come back from the WAL alone
+        reopened = Library(self.test_file)
+        self.assertFalse(reopened.find_book("5").available)
+        self.assertIn("5", reopened.find_member("m5").borrowed_books)
+        reopened.close()
+
+    def test_snapshot_truncates_wal_and_skips_applied_events(self):
+        lib = Library(self.test_file, snapshot_every=2)
+        lib.add_book(Book("6", "Six", "Author"))
+        lib.add_book(Book("7", "Seven", "Author"))  # schedules a background snapshot
+        deadline = time.time() + 2
+        while os.path.getsize(lib.wal_file) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(os.path.getsize(lib.wal_file), 0)
+        lib.remove_book("6")
+        lib.close()
+        reopened = Library(self.test_file)
+        self.assertEqual([b.book_id for b in reopened.books], ["7"])
+        reopened.close()
+
+    def test_search_matches_substrings_after_changes(self):
+        self.lib.add_book(Book("8", "The Pragmatic Programmer", "Hunt"))
+        self.lib.add_book(Book("9", "Programming Pearls", "Bentley"))
+        self.assertEqual([b.book_id for b in self.lib.search_books("GRAM")], ["9", "8"])
+        self.assertEqual([b.book_id for b in self.lib.search_books("nt")], ["9", "8"])
+        self.assertEqual(self.lib.search_books("mmerhu"), [])
+        self.lib.remove_book("9")
+        self.assertEqual([b.book_id for b in self.lib.search_books("gram")], ["8"])
+        self.assertEqual([b.book_id for b in self.lib.search_books("nt")], ["8"])
+
+    def test_next_ids_follow_highest_generated_id(self):
+        self.assertEqual(self.lib.next_book_id(), "B1")
+        self.lib.add_book(Book("B7", "Seven", "Author"))
+        self.lib.add_book(Book("custom", "Other", "Author"))
+        self.assertEqual(self.lib.next_book_id(), "B8")
+        self.lib.register_member(Member("Dan", "M3"))
+        self.assertEqual(self.lib.next_member_id(), "M4")
+        self.lib.close()
+        self.lib = Library(self.test_file)
+        self.assertEqual(self.lib.next_book_id(), "B8")
+
+    def test_concurrent_borrows_lend_a_book_once(self):
+        self.lib.add_book(Book("10", "Shared", "Author"))
+        for i in range(8):
+            self.lib.register_member(Member(f"T{i}", f"t{i}"))
+        wins = []
+
+        def borrow(mid):
+            try:
+                self.lib.borrow_book(mid, "10")
+                wins.append(mid)
+            except BookNotAvailableError:
+                pass
+
+        threads = [threading.Thread(target=borrow, args=(f"t{i}",)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(wins), 1)
+        self.assertEqual(self.lib.find_member(wins[0]).borrowed_books, {"10"})
+
+    def test_cached_book_dict_follows_availability(self):
+        b = Book("11", "Cached", "Author")
+        self.lib.add_book(b)
+        self.lib.register_member(Member("Eve", "m11"))
+        self.assertIs(b.to_dict(), b.to_dict())
+        self.lib.borrow_book("m11", "11")
+        self.assertFalse(b.to_dict()["available"])
+        self.lib.return_book("m11", "11")
+        self.assertTrue(b.to_dict()["available"])
+
+    def test_loads_single_object_snapshot(self):
+        self.lib.close()
+        legacy = {
+            "books": [{"book_id": "12", "title": "Old", "author": "Format", "available": False}],
+            "members": [{"name": "Fay", "member_id": "m12", "borrowed_books": ["12"]}],
+        }
+        with open(self.test_file, "wb") as f:
+            f.write(json_dumps(legacy))
+        self.lib = Library(self.test_file)
+        self.assertFalse(self.lib.find_book("12").available)
+        self.assertEqual(self.lib.find_member("m12").borrowed_books, {"12"})
+        self.lib.snapshot()
+        with open(self.test_file, "rb") as f:
+            self.assertEqual(json_loads(f.readline())["type"], "header")
+
+    def test_list_available_books_tracks_borrows_and_removals(self):
+        for bid in ("13", "14", "15"):
+            self.lib.add_book(Book(bid, f"Title {bid}", "Author"))
+        self.lib.register_member(Member("Gus", "m13"))
+        self.lib.borrow_book("m13", "14")
+        self.assertEqual([b.book_id for b in self.lib.list_available_books()], ["13", "15"])
+        self.lib.remove_book("13")
+        self.lib.return_book("m13", "14")
+        self.lib.borrow_book("m13", "15")
+        self.assertEqual([b.book_id for b in self.lib.list_available_books()], ["14"])
+
+    def test_mutations_after_close_raise_and_write_nothing(self):
+        self.lib.add_book(Book("16", "Before", "Close"))
+        self.lib.register_member(Member("Hal", "m16"))
+        self.lib.close()
+        calls = [
+            lambda: self.lib.add_book(Book("17", "After", "Close")),
+            lambda: self.lib.remove_book("16"),
+            lambda: self.lib.register_member(Member("Ivy", "m17")),
+            lambda: self.lib.borrow_book("m16", "16"),
+            lambda: self.lib.return_book("m16", "16"),
+        ]
+        for call in calls:
+            with self.assertRaises(LibraryError):
+                call()
+        self.assertEqual([b.book_id for b in self.lib.books], ["16"])
+        self.assertTrue(self.lib.find_book("16").available)
+        self.assertEqual(os.path.getsize(self.lib.wal_file), 0)
+
+    def test_search_while_books_are_removed(self):
+        for i in range(300):
+            self.lib.add_book(Book(f"R{i}", f"Removable {i}", "Author"))
+        errors = []
+
+        def search():
+            try:
+                for _ in range(50):
+                    self.lib.search_books("removable")
+                    self.lib.search_books("r")
+            except Exception as e:
+                errors.append(e)
+
+        searcher = threading.Thread(target=search)
+        searcher.start()
+        for i in range(300):
+            self.lib.remove_book(f"R{i}")
+        searcher.join()
+        self.assertEqual(errors, [])
+
 # -------------------- Entrypoint --------------------
 if __name__ == "__main__":
+    if os.environ.get("LMS_TRACE"):
+        logging.basicConfig(level=logging.DEBUG, format="[LOG] %(message)s")
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         # run tests
         unittest.main(argv=[sys.argv[0]])
     else:
         lib = Library()
-        run_console(lib)
+        try:
+            run_console(lib)
+        finally:
+            lib.close()
@@ -1,28 +1,91 @@
-from typing import Dict, Any
+import re
+from typing import Any, Dict, Optional
 from .exceptions import BookNotAvailableError
 
 
+_BOOK_ID_RE = re.compile(r"B(\d+)")
+
+def id_number(value: str, pattern: "re.Pattern[str]") -> Optional[int]:
+    """Numeric suffix of generated ids like "B12", or None for other ids."""
+    match = pattern.fullmatch(value)
+    return int(match.group(1)) if match else None
+
 class Book:
-    """Represents a book in the library."""
+    """Represents a book in the library.
+
+    id, title and author are fixed at construction; only availability changes,
+    which lets to_dict() hand back one cached dict per book.
+    """
+
+    __slots__ = ("_book_id", "_num", "_title", "_author", "_available", "_title_lc", "_author_lc", "_dict")
+
+    def __init__(self, book_id: Any, title: str, author: str, available: bool = True):
+        if book_id is None:
+            raise ValueError("book_id cannot be empty")
+        book_id = str(book_id)
+        if book_id.strip() == "":
+            raise ValueError("book_id cannot be empty")
+        if not isinstance(title, str) or title.strip() == "":
+            raise ValueError("title must be a non-empty string")
+        if not isinstance(author, str) or author.strip() == "":
+            raise ValueError("author must be a non-empty string")
+        self._book_id = book_id
+        self._num = id_number(book_id, _BOOK_ID_RE)  # cached for next_book_id
+        self._title = title.strip()
+        self._author = author.strip()
+        self._title_lc = self._title.lower()  # cached for search
+        self._author_lc = self._author.lower()
+        self._available = available
+        self._dict: Optional[Dict[str, Any]] = None
+
+    @property
+    def book_id(self) -> str:
+        return self._book_id
 
-    def __init__(self, book_id: str, title: str, author: str, available: bool = True):
-        self.book_id = book_id
-        self.title = title
-        self.author = author
-        self.available = available
+    @property
+    def title(self) -> str:
+        return self._title
 
-    def borrow(self):
-        if not self.available:
-            raise BookNotAvailableError(f"Book '{self.title}' is already borrowed.")
-        self.available = False
+    @property
+    def author(self) -> str:
+        return self._author
 
-    def return_book(self):
-        self.available = True
+    @property
+    def available(self) -> bool:
+        return self._available
+
+    def borrow(self) -> None:
+        """Mark book as borrowed; raise if not available."""
+        if not self._available:
+            raise BookNotAvailableError(f"Book '{self.title}' is not available")
+        self._available = False
+        if self._dict is not None:
+            self._dict["available"] = False
+
+    def return_book(self) -> None:
+        """Mark book as returned."""
+        self._available = True
+        if self._dict is not None:
+            self._dict["available"] = True
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "book_id": self.book_id,
-            "title": self.title,
-            "author": self.author,
-            "available": self.available,
-        }
+        """Plain-dict form of the book; the same dict is returned each call, so don't mutate it."""
+        if self._dict is None:
+            self._dict = {"book_id": self._book_id, "title": self._title, "author": self._author, "available": self._available}
+        return self._dict
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Book":
+        return cls(d["book_id"], d["title"], d["author"], d.get("available", True))
+
+    # operator overloading
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Book):
+            return NotImplemented
+        return self.book_id == other.book_id
+
+    def __lt__(self, other: "Book") -> bool:
+        return self.title.lower() < other.title.lower()
+
+    def __repr__(self) -> str:
+        return f"Book({self.book_id!r}, {self.title!r}, {self.author!r}, available={self.available})"
@@ -11,3 +11,7 @@ class BookNotFoundError(LibraryError):
 
 class MemberNotFoundError(LibraryError):
     pass
+
+
+class BookBorrowedError(LibraryError):
+    pass
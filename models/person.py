@@ -1,35 +1,67 @@
+import re
 from abc import ABC, abstractmethod
-from typing import List
-from .book import Book
+from typing import ClassVar, Set
+from .book import Book, id_number
 
 
 class Person(ABC):
-    """Abstract base class for library users."""
+    """Abstract base for people in the library."""
+
+    __slots__ = ("_name", "_person_id")
 
     def __init__(self, name: str, person_id: str):
-        self.name = name
-        self.person_id = person_id
+        self._name = name
+        self._person_id = str(person_id)
 
+    @property
     @abstractmethod
-    def get_role(self):
-        pass
+    def role(self) -> str:
+        """Role name; subclasses override it with a plain class attribute."""
+
+    def get_role(self) -> str:
+        return self.role
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def person_id(self) -> str:
+        return self._person_id
+
+
+_MEMBER_ID_RE = re.compile(r"M(\d+)")
 
 class Member(Person):
+    """Library member who can borrow books."""
+
+    __slots__ = ("borrowed_books", "_num")
+    role: ClassVar[str] = "Member"
+
     def __init__(self, name: str, member_id: str):
         super().__init__(name, member_id)
-        self.borrowed_books: List[str] = []
+        self.borrowed_books: Set[str] = set()
+        self._num = id_number(self._person_id, _MEMBER_ID_RE)  # cached for next_member_id
+
+    def borrow_book(self, book: Book) -> None:
+        self.borrowed_books.add(book.book_id)
 
-    def get_role(self):
-        return "Member"
+    def return_book(self, book: Book) -> None:
+        self.borrowed_books.discard(book.book_id)
 
-    def borrow_book(self, book: Book):
-        self.borrowed_books.append(book.book_id)
+    def __add__(self, other: "Member") -> "Member":
+        if not isinstance(other, Member):
+            return NotImplemented
+        merged = Member(f"{self.name}&{other.name}", f"{self.person_id}+{other.person_id}")
+        merged.borrowed_books = self.borrowed_books | other.borrowed_books
+        return merged
+
+    def __repr__(self) -> str:
+        return f"Member({self.name!r}, {self.person_id!r}, borrowed={sorted(self.borrowed_books)!r})"
 
-    def return_book(self, book: Book):
-        if book.book_id in self.borrowed_books:
-            self.borrowed_books.remove(book.book_id)
 
-        
 class Librarian(Person):
-    def get_role(self):
-        return "Librarian"
+    """Library staff."""
+
+    __slots__ = ()
+    role: ClassVar[str] = "Librarian"
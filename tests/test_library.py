@@ -1,15 +1,122 @@
+import sqlite3
 import unittest
 from library import Library
 from models.book import Book
+from models.person import Member
+from models.exceptions import (
+    BookBorrowedError,
+    BookNotAvailableError,
+    BookNotFoundError,
+    LibraryError,
+    MemberNotFoundError,
+)
 
 class TestLibrary(unittest.TestCase):
     def setUp(self):
         self.lib = Library(":memory:")
 
+    def tearDown(self):
+        self.lib.db.close()
+
     def test_add_book(self):
         book = Book("1", "Python", "Guido")
         self.lib.add_book(book)
         self.assertEqual(len(self.lib.list_books()), 1)
 
+    def test_remove_book(self):
+        self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.remove_book("1")
+        self.assertEqual(self.lib.list_books(), [])
+        with self.assertRaises(BookNotFoundError):
+            self.lib.remove_book("1")
+
+    def test_remove_borrowed_book_is_refused(self):
+        self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.register_member(Member("Alice", "m1"))
+        self.lib.borrow_book("m1", "1")
+        with self.assertRaises(BookBorrowedError):
+            self.lib.remove_book("1")
+        self.assertEqual(len(self.lib.list_books()), 1)
+        self.lib.return_book("m1", "1")
+        self.lib.remove_book("1")
+        self.assertEqual(self.lib.list_books(), [])
+
+    def test_list_available_books(self):
+        self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.add_book(Book("2", "Learn C++", "Bjarne", available=False))
+        available = self.lib.list_available_books()
+        self.assertEqual([b["book_id"] for b in available], ["1"])
+
+    def test_search_books(self):
+        self.lib.add_book(Book("1", "Python Programming", "Guido"))
+        self.lib.add_book(Book("2", "Learn C++", "Bjarne"))
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("PYTHON")], ["1"])
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("bjar")], ["2"])
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("ytho")], ["1"])
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("c+")], ["2"])
+
+    def test_search_treats_like_wildcards_literally(self):
+        self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.add_book(Book("2", "100% Pure_Code", "Back\\slash"))
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("%")], ["2"])
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("y_")], [])
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("e_")], ["2"])
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("\\")], ["2"])
+        self.assertEqual([b["book_id"] for b in self.lib.search_books("0% p")], ["2"])
+
+    def test_borrow_and_return(self):
+        self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.register_member(Member("Alice", "m1"))
+        self.lib.borrow_book("m1", "1")
+        self.assertFalse(self.lib.find_book("1")["available"])
+        self.assertEqual([b["member_id"] for b in self.lib.list_borrowed_books()], ["m1"])
+        self.lib.return_book("m1", "1")
+        self.assertTrue(self.lib.find_book("1")["available"])
+        self.assertEqual(self.lib.list_borrowed_books(), [])
+
+    def test_borrow_failures_change_nothing(self):
+        self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.register_member(Member("Alice", "m1"))
+        with self.assertRaises(MemberNotFoundError):
+            self.lib.borrow_book("nobody", "1")
+        self.assertTrue(self.lib.find_book("1")["available"])
+        self.lib.borrow_book("m1", "1")
+        with self.assertRaises(BookNotAvailableError):
+            self.lib.borrow_book("m1", "1")
+        self.assertEqual(len(self.lib.list_borrowed_books()), 1)
+
+    def test_return_failures_raise_and_change_nothing(self):
+        self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.register_member(Member("Alice", "m1"))
+        self.lib.register_member(Member("Bob", "m2"))
+        self.lib.borrow_book("m1", "1")
+        with self.assertRaises(MemberNotFoundError):
+            self.lib.return_book("nobody", "1")
+        with self.assertRaises(BookNotFoundError):
+            self.lib.return_book("m1", "missing")
+        with self.assertRaises(LibraryError):
+            self.lib.return_book("m2", "1")
+        self.assertFalse(self.lib.find_book("1")["available"])
+        self.assertEqual([b["member_id"] for b in self.lib.list_borrowed_books()], ["m1"])
+
+    def test_add_books_bulk_is_atomic(self):
+        self.lib.db.add_books_bulk([
+            {"book_id": "1", "title": "Python", "author": "Guido"},
+            {"book_id": "2", "title": "Learn C++", "author": "Bjarne"},
+        ])
+        self.assertEqual(len(self.lib.list_books()), 2)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.lib.db.add_books_bulk([
+                {"book_id": "3", "title": "Rust", "author": "Graydon"},
+                {"book_id": "1", "title": "Duplicate", "author": "Nobody"},
+            ])
+        self.assertEqual(len(self.lib.list_books()), 2)
+
+    def test_closed_database_rejects_writes(self):
+        self.lib.db.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            self.lib.add_book(Book("1", "Python", "Guido"))
+        self.lib.db.close()  # closing twice is harmless
+
 if __name__ == "__main__":
     unittest.main()
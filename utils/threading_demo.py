@@ -1,15 +1,22 @@
+# run from the repo root: python -m utils.threading_demo
+import os
+import tempfile
 import threading
-from library import Library
 
-lock = threding.Lock()
-lib = Library()
+from library_system import Book, Library, LibraryError, Member
+
+# scratch data file so the demo never touches library_data.json
+lib = Library(os.path.join(tempfile.mkdtemp(), "demo_data.json"))
+lib.add_book(Book("b1", "Concurrency in Python", "Demo Author"))
+lib.register_member(Member("Demo Member", "m1"))
 
 def borrow_simulation(member_id, book_id):
-    with lock:
-        try:
-            print(f"Member {member_id} borrowing book {book_id}")
-        except Exception as e:
-            print("Error:", e)
+    # Library serializes mutations with its own lock, so only one thread wins
+    try:
+        lib.borrow_book(member_id, book_id)
+        print(f"Member {member_id} borrowed book {book_id}")
+    except LibraryError as e:
+        print("Error:", e)
 
 threads = [threading.Thread(target=borrow_simulation, args=("m1", "b1")) for _ in range(3)]
 
@@ -17,3 +24,5 @@ for t in threads:
     t.start()
 for t in threads:
     t.join()
+
+lib.close()
@@ -0,0 +1 @@
+from library_api import app